@@ -1,5 +1,11 @@
+import logging
+from typing import Optional
+
+from pydantic import model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+logger = logging.getLogger(__name__)
+
 
 class Settings(BaseSettings):
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8")
@@ -10,9 +16,32 @@ class Settings(BaseSettings):
     browser_use_model: str = "bu-latest"
     browser_use_api_key : str =""
     upload_dir: str = "./data/uploads"
-    ocr_min_text_length: int = 200
+    ocr_min_page_text_length: int = 40
+    # Deprecated whole-document threshold; accepted so old .env files load, but unused.
+    ocr_min_text_length: Optional[int] = None
+    ocr_cache_dir: str = "./LOG/ocr_cache"
+    ocr_workers: int = 0
+    ocr_lang: str = "eng"
+    ocr_dpi: int = 200
+    max_document_chars: int = 40000
+    allow_unsafe_json_recovery: bool = False
     browser_headless: bool = False
     log_level: str = "INFO"
+    max_concurrent_jobs: int = 2
+    job_ttl_seconds: int = 3600
+    job_archive_dir: str = "./LOG/jobs"
+    llm_cache_enabled: bool = False
+    llm_cache_dir: str = "./LOG/cache"
+
+    @model_validator(mode="after")
+    def _warn_deprecated(self) -> "Settings":
+        if self.ocr_min_text_length is not None:
+            logger.warning(
+                "OCR_MIN_TEXT_LENGTH is deprecated and ignored; OCR now runs per page "
+                "below OCR_MIN_PAGE_TEXT_LENGTH (%s non-whitespace characters)",
+                self.ocr_min_page_text_length,
+            )
+        return self
 
 
 settings = Settings()
@@ -1,4 +1,5 @@
 import asyncio
+import copy
 import logging
 import sys
 from pathlib import Path
@@ -14,9 +15,15 @@ from app.models.schemas import CreateJobRequest, JobResult, JobStatus, UploadRes
 from app.services.agent import scan_and_fill_form
 from app.services.jobs import JobStore
 from app.services.llm import build_llm
-from app.services.json_log import save_text_log
-from app.services.ocr import extract_passport_text, extract_pdf_text
-from app.services.storage import save_uploads
+from app.services.json_log import save_text_log, start_log_writer, stop_log_writer
+from app.services.ocr import (
+    extract_passport_text,
+    extract_pdf_text,
+    has_mrz_section,
+    shutdown_ocr_pool,
+)
+from app.services.ocr_cache import cached_extract
+from app.services.storage import get_upload_files, save_uploads
 
 
 if sys.platform.startswith("win"):
@@ -40,7 +47,57 @@ frontend_dir = Path("frontend")
 app.mount("/static", StaticFiles(directory=str(frontend_dir)), name="static")
 
 job_store = JobStore()
-uploads_index: Dict[str, Dict[str, str]] = {}
+
+
+@app.on_event("startup")
+async def _start_log_writer() -> None:
+    await start_log_writer()
+
+
+@app.on_event("startup")
+async def _init_llm() -> None:
+    app.state.llm = build_llm()
+
+
+@app.on_event("startup")
+async def _start_job_workers() -> None:
+    app.state.job_queue = asyncio.Queue()
+    worker_count = max(1, settings.max_concurrent_jobs)
+    app.state.job_workers = [
+        asyncio.create_task(_job_worker(app.state.job_queue)) for _ in range(worker_count)
+    ]
+    logger.info("Started %s job workers", worker_count)
+
+
+@app.on_event("startup")
+async def _start_job_eviction() -> None:
+    app.state.job_eviction = asyncio.create_task(_evict_expired_jobs())
+
+
+@app.on_event("shutdown")
+async def _stop_job_eviction() -> None:
+    task = getattr(app.state, "job_eviction", None)
+    if task is not None:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+
+@app.on_event("shutdown")
+async def _stop_job_workers() -> None:
+    workers = getattr(app.state, "job_workers", [])
+    for worker in workers:
+        worker.cancel()
+    await asyncio.gather(*workers, return_exceptions=True)
+
+
+@app.on_event("shutdown")
+async def _stop_ocr_pool() -> None:
+    await asyncio.to_thread(shutdown_ocr_pool)
+
+
+@app.on_event("shutdown")
+async def _stop_log_writer() -> None:
+    await stop_log_writer()
 
 
 @app.get("/", response_class=HTMLResponse)
@@ -62,7 +119,6 @@ async def upload_files(
     logger.info("Upload requested: passport=%s, g28=%s", passport.filename, g28.filename)
     upload_id, files = save_uploads(passport, g28)
     logger.info("Upload saved: upload_id=%s", upload_id)
-    uploads_index[upload_id] = files
     return UploadResponse(upload_id=upload_id, files=files)
 
 
@@ -72,37 +128,57 @@ async def create_job(request: CreateJobRequest) -> dict:
         logger.error("GOOGLE_API_KEY not set; cannot start job")
         raise HTTPException(status_code=400, detail="GOOGLE_API_KEY is not set")
 
-    files = uploads_index.get(request.upload_id)
+    files = get_upload_files(request.upload_id)
     if not files:
         logger.error("Upload not found: upload_id=%s", request.upload_id)
         raise HTTPException(status_code=404, detail="Upload not found")
 
     logger.info("Creating job for upload_id=%s form_url=%s", request.upload_id, request.form_url)
-    job = await job_store.create(request.upload_id, request.form_url, files)
-    asyncio.create_task(_run_job(job.job_id))
+    job = job_store.create(request.upload_id, request.form_url, files)
+    await app.state.job_queue.put(job.job_id)
     return {"job_id": job.job_id}
 
 
 @app.get("/api/jobs/{job_id}")
 async def get_job(job_id: str) -> dict:
-    view = await job_store.view(job_id)
+    view = job_store.view(job_id)
     if not view:
         logger.warning("Job not found: job_id=%s", job_id)
         raise HTTPException(status_code=404, detail="Job not found")
     return view.model_dump(by_alias=True)
 
 
+async def _evict_expired_jobs() -> None:
+    while True:
+        await asyncio.sleep(60)
+        try:
+            job_store.evict_expired(settings.job_ttl_seconds)
+        except Exception as exc:  # pragma: no cover - log only
+            logger.error("Job eviction failed: %s", exc)
+
+
+async def _job_worker(queue: asyncio.Queue) -> None:
+    while True:
+        job_id = await queue.get()
+        try:
+            await _run_job(job_id)
+        finally:
+            queue.task_done()
+
+
 async def _run_job(job_id: str) -> None:
-    job = await job_store.get(job_id)
+    job = job_store.get(job_id)
     if not job:
         logger.error("Job missing during execution: job_id=%s", job_id)
         return
 
     try:
         logger.info("Job start: job_id=%s", job_id)
-        llm = build_llm()
+        # browser_use's Agent wraps llm.ainvoke for token accounting on every run,
+        # so each job gets its own shallow copy instead of stacking wrappers.
+        llm = copy.copy(app.state.llm)
 
-        await job_store.set_status(job_id, JobStatus.extracting_docs)
+        job_store.set_status(job_id, JobStatus.extracting_docs)
         logger.info("Job %s: extracting_docs", job_id)
         passport_path = job.files.get("passport") or _find_first(job.files, "passport")
         g28_path = job.files.get("g28") or _find_first(job.files, "g28")
@@ -115,11 +191,11 @@ async def _run_job(job_id: str) -> None:
             Path(passport_path).name,
             Path(g28_path).name,
         )
-        passport_text, _passport_ocr = await asyncio.to_thread(
-            extract_passport_text, passport_path
-        )
-        g28_text, _g28_ocr = await asyncio.to_thread(
-            extract_pdf_text, g28_path, False, "two-column"
+        (passport_text, _passport_ocr), (g28_text, _g28_ocr) = await asyncio.gather(
+            asyncio.to_thread(
+                cached_extract, extract_passport_text, passport_path, cache_if=has_mrz_section
+            ),
+            asyncio.to_thread(cached_extract, extract_pdf_text, g28_path, False, "two-column"),
         )
         save_text_log(passport_text, "passport_text")
         save_text_log(g28_text, "g28_text")
@@ -130,7 +206,7 @@ async def _run_job(job_id: str) -> None:
             len(g28_text),
         )
 
-        await job_store.set_status(job_id, JobStatus.filling_form)
+        job_store.set_status(job_id, JobStatus.filling_form)
         logger.info("Job %s: scan+fill with document context", job_id)
         required_fields, extracted_values, fill_summary = await scan_and_fill_form(
             llm,
@@ -151,11 +227,11 @@ async def _run_job(job_id: str) -> None:
             extracted_values=extracted_values,
             fill_summary=fill_summary,
         )
-        await job_store.set_result(job_id, result)
+        job_store.set_result(job_id, result)
         logger.info("Job %s: done", job_id)
     except Exception as exc:
         logger.exception("Job %s failed: %s", job_id, exc)
-        await job_store.set_error(job_id, str(exc))
+        job_store.set_error(job_id, str(exc))
 
 
 def _find_first(files: Dict[str, str], hint: str) -> str:
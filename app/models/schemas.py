@@ -1,7 +1,7 @@
 from enum import Enum
-from typing import Dict, List, Optional
+from typing import Dict, List, Literal, Optional, get_args
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 
 
 class UploadResponse(BaseModel):
@@ -24,23 +24,88 @@ class JobStatus(str, Enum):
     error = "error"
 
 
+FieldType = Literal[
+    "text",
+    "date",
+    "select",
+    "checkbox",
+    "radio",
+    "email",
+    "tel",
+    "address",
+    "number",
+    "file",
+    "unknown",
+]
+FIELD_TYPES = frozenset(get_args(FieldType))
+
+
+_FALSE_STRINGS = frozenset({"", "0", "false", "no", "n", "off", "none", "null", "optional"})
+
+
+def _to_text(value: object) -> str:
+    if value is None:
+        return ""
+    return value if isinstance(value, str) else str(value)
+
+
+def _to_bool(value: object) -> bool:
+    if isinstance(value, str):
+        return value.strip().lower() not in _FALSE_STRINGS
+    return bool(value)
+
+
 class FieldRequirement(BaseModel):
-    name: str
-    label: str
-    field_type: str = Field(default="text", alias="type")
+    name: str = ""
+    label: str = ""
+    field_type: FieldType = Field(default="text", alias="type")
     required: bool = False
     notes: Optional[str] = None
 
-    model_config = {"populate_by_name": True}
+    model_config = {"populate_by_name": True, "coerce_numbers_to_str": True}
+
+    @field_validator("field_type", mode="before")
+    @classmethod
+    def _coerce_field_type(cls, value: object) -> str:
+        text = str(value or "").strip().lower()
+        return text if text in FIELD_TYPES else "unknown"
+
+    @field_validator("name", "label", mode="before")
+    @classmethod
+    def _coerce_text(cls, value: object) -> str:
+        return _to_text(value)
+
+    @field_validator("required", mode="before")
+    @classmethod
+    def _coerce_required(cls, value: object) -> bool:
+        return _to_bool(value)
 
 
 class FieldValue(BaseModel):
-    name: str
-    value: str
+    name: str = ""
+    value: str = ""
     source: Optional[str] = None
     confidence: Optional[float] = None
     notes: Optional[str] = None
 
+    model_config = {"coerce_numbers_to_str": True}
+
+    @field_validator("name", "value", mode="before")
+    @classmethod
+    def _coerce_text(cls, value: object) -> str:
+        return _to_text(value)
+
+
+class ScanAndFillResult(BaseModel):
+    fields: List[FieldRequirement] = Field(default_factory=list)
+    values: List[FieldValue] = Field(default_factory=list)
+    summary: str = ""
+
+    @field_validator("summary", mode="before")
+    @classmethod
+    def _coerce_summary(cls, value: object) -> str:
+        return _to_text(value)
+
 
 class JobResult(BaseModel):
     required_fields: List[FieldRequirement] = Field(default_factory=list)
@@ -3,11 +3,15 @@ import ast
 import json
 import logging
 import re
-from typing import List, Tuple
+from typing import List, Optional, Tuple, Type
+
+from pydantic import BaseModel, TypeAdapter, ValidationError
 
 from app.config import settings
-from app.models.schemas import FieldRequirement, FieldValue
+from app.models.schemas import FieldRequirement, FieldValue, JobResult, ScanAndFillResult
 from app.services.json_log import save_json_log, save_text_log
+from app.services.llm import repair_structured_output, resolve_llm
+from app.services.llm_cache import cache_key, load_cached_result, save_cached_result
 
 try:
     from browser_use import Agent, Browser
@@ -18,6 +22,47 @@ except ImportError:  # pragma: no cover
 
 logger = logging.getLogger(__name__)
 
+SCAN_FILL_PROMPT_VERSION = "scan_fill_v2"
+
+_FIELDS_TA = TypeAdapter(List[FieldRequirement])
+
+_SCAN_FILL_INSTRUCTIONS = """
+You are given Passport text and G-28 text below.
+Identify all user-fillable fields, fill them immediately using the document data,
+and do not submit the form. Leave the browser ready for human review.
+""".strip()
+
+_SCAN_FILL_RESPONSE_FORMAT = """
+Return JSON only with this shape:
+{
+  "fields": [
+    {
+      "name": "short machine-friendly field name",
+      "label": "visible label or placeholder",
+      "type": "text|date|select|checkbox|radio|email|tel|address|number|file",
+      "required": true,
+      "notes": "any helper text or constraints"
+    }
+  ],
+  "values": [
+    {
+      "name": "field name from fields",
+      "value": "value used to fill the form (empty string if missing)",
+      "source": "passport|g28|both|unknown",
+      "notes": "short reason or location"
+    }
+  ],
+  "summary": "short summary of filled vs missing fields"
+}
+Use double quotes for all JSON keys and string values. Do not include trailing text.
+""".strip()
+
+_JSON_START_RE = re.compile(r"\{")
+_JSON_DECODER = json.JSONDecoder()
+_JSON_LITERAL_RE = re.compile(r":\s*(true|false|null)\b")
+_PY_LITERALS = {"true": "True", "false": "False", "null": "None"}
+_MRZ_SECTION_RE = re.compile(r"(?:^|\n\n)\[MRZ(?: PARSED)?\]\n")
+
 
 async def scan_form_fields(llm, form_url: str) -> List[FieldRequirement]:
     logger.info("Scanning form fields: %s", form_url)
@@ -42,17 +87,7 @@ Use double quotes for all JSON keys and string values. Do not include trailing t
     output, browser = await _run_agent(task, llm, keep_open=False)
     save_text_log(output, "agent_form_fields_raw")
     data = _parse_json(output, prefix="agent_form_fields")
-    fields = []
-    for item in data.get("fields", []):
-        fields.append(
-            FieldRequirement(
-                name=str(item.get("name", "")),
-                label=str(item.get("label", "")),
-                type=str(item.get("type", "text")),
-                required=bool(item.get("required", False)),
-                notes=item.get("notes"),
-            )
-        )
+    fields = _FIELDS_TA.validate_python(data.get("fields", []))
     _close_browser(browser)
     logger.info("Form scan complete: %s fields", len(fields))
     return fields
@@ -88,86 +123,118 @@ async def scan_and_fill_form(
     g28_text: str,
 ) -> tuple[List[FieldRequirement], List[FieldValue], str]:
     logger.info("Scanning and filling form with document context: %s", form_url)
-    task = f"""
-Open this form: {form_url}
-You are given Passport text and G-28 text below.
-Identify all user-fillable fields, fill them immediately using the document data,
-and do not submit the form. Leave the browser ready for human review.
-
-Passport text:
-{passport_text}
+    key = cache_key(
+        *resolve_llm(),
+        SCAN_FILL_PROMPT_VERSION,
+        str(settings.max_document_chars),
+        form_url,
+        passport_text,
+        g28_text,
+    )
+    if settings.llm_cache_enabled:
+        cached = load_cached_result(key)
+        if cached is not None:
+            # The cache only saves the scan; the browser still has to be filled for review.
+            logger.info("Scan+fill served from cache; filling form with cached values")
+            summary = await fill_form(llm, form_url, cached.extracted_values)
+            return cached.required_fields, cached.extracted_values, summary
+
+    task = "".join(
+        [
+            "Open this form: ",
+            form_url,
+            "\n",
+            _SCAN_FILL_INSTRUCTIONS,
+            "\n\nPassport text:\n",
+            _truncate_document(passport_text, "passport"),
+            "\n\nG-28 text:\n",
+            _truncate_document(g28_text, "g28"),
+            "\n\n",
+            _SCAN_FILL_RESPONSE_FORMAT,
+        ]
+    )
+
+    output, _browser = await _run_agent(
+        task, llm, keep_open=True, output_model_schema=ScanAndFillResult
+    )
+    save_text_log(output, "agent_scan_fill_raw")
+    parsed = await _parse_scan_fill(llm, output, prefix="agent_scan_fill")
+    fields = parsed.fields
+    values = parsed.values
+    summary = parsed.summary.strip()
+    logger.info("Scan+fill complete: fields=%s values=%s", len(fields), len(values))
+    if settings.llm_cache_enabled:
+        save_cached_result(
+            key,
+            JobResult(required_fields=fields, extracted_values=values, fill_summary=summary),
+        )
+    return fields, values, summary
 
-G-28 text:
-{g28_text}
 
-Return JSON only with this shape:
-{{
-  "fields": [
-    {{
-      "name": "short machine-friendly field name",
-      "label": "visible label or placeholder",
-      "type": "text|date|select|checkbox|radio|email|tel|address|number|file",
-      "required": true,
-      "notes": "any helper text or constraints"
-    }}
-  ],
-  "values": [
-    {{
-      "name": "field name from fields",
-      "value": "value used to fill the form (empty string if missing)",
-      "source": "passport|g28|both|unknown",
-      "notes": "short reason or location"
-    }}
-  ],
-  "summary": "short summary of filled vs missing fields"
-}}
-Use double quotes for all JSON keys and string values. Do not include trailing text.
-""".strip()
+def _truncate_document(text: str, name: str) -> str:
+    limit = settings.max_document_chars
+    if limit <= 0 or len(text) <= limit:
+        return text
+    logger.info("Truncating %s text for prompt: %s -> %s chars", name, len(text), limit)
+    # MRZ sections are appended last and hold the most reliable passport fields; keep them.
+    match = _MRZ_SECTION_RE.search(text)
+    split = match.start() if match else len(text)
+    tail = text[split:]
+    return text[: max(0, limit - len(tail))] + "\n[truncated]" + tail
 
-    output, _browser = await _run_agent(task, llm, keep_open=True)
-    save_text_log(output, "agent_scan_fill_raw")
-    data = _parse_json(output, prefix="agent_scan_fill")
-    fields = []
-    for item in data.get("fields", []):
-        fields.append(
-            FieldRequirement(
-                name=str(item.get("name", "")),
-                label=str(item.get("label", "")),
-                type=str(item.get("type", "text")),
-                required=bool(item.get("required", False)),
-                notes=item.get("notes"),
-            )
-        )
 
-    values = []
-    for item in data.get("values", []):
-        values.append(
-            FieldValue(
-                name=str(item.get("name", "")),
-                value=str(item.get("value", "")),
-                source=item.get("source"),
-                notes=item.get("notes"),
-            )
-        )
+async def _parse_scan_fill(llm, output: str, prefix: str) -> ScanAndFillResult:
+    if not output.strip():
+        raise RuntimeError("Agent finished without a final result for scan+fill")
+    try:
+        parsed = ScanAndFillResult.model_validate_json(output)
+    except ValidationError as exc:
+        logger.warning("Structured scan+fill output invalid; falling back: %s", exc)
+    else:
+        save_json_log(parsed.model_dump(by_alias=True), prefix)
+        return parsed
 
-    summary = str(data.get("summary", "")).strip()
-    logger.info("Scan+fill complete: fields=%s values=%s", len(fields), len(values))
-    return fields, values, summary
+    try:
+        return ScanAndFillResult.model_validate(_parse_json(output, prefix=prefix))
+    except (ValueError, SyntaxError) as exc:
+        parsed = await repair_structured_output(llm, output, ScanAndFillResult, exc)
+    save_json_log(parsed.model_dump(by_alias=True), prefix)
+    return parsed
 
 
-async def _run_agent(task: str, llm, keep_open: bool) -> Tuple[str, object]:
+async def _run_agent(
+    task: str,
+    llm,
+    keep_open: bool,
+    output_model_schema: Optional[Type[BaseModel]] = None,
+) -> Tuple[str, object]:
     if Agent is None:
         raise RuntimeError("browser_use is not installed")
 
     browser = Browser(headless=False,keep_alive=True)
 
     logger.info("Agent run start (keep_open=%s)", keep_open)
-    agent = Agent(task=task, llm=llm, browser=browser)
+    agent_kwargs = {}
+    if output_model_schema is not None:
+        agent_kwargs["output_model_schema"] = output_model_schema
+    agent = Agent(task=task, llm=llm, browser=browser, **agent_kwargs)
     result = agent.run()
     if asyncio.iscoroutine(result):
         result = await result
     logger.info("Agent run finished")
-    return str(result), browser
+    return _agent_output(result), browser
+
+
+def _agent_output(result: object) -> str:
+    if isinstance(result, str):
+        return result
+    final_result = getattr(result, "final_result", None)
+    if callable(final_result):
+        return final_result() or ""
+    text = getattr(result, "completion", None) or getattr(result, "output_text", None)
+    if isinstance(text, str):
+        return text
+    return str(result)
 
 
 def _close_browser(browser: object) -> None:
@@ -188,27 +255,27 @@ def _parse_json(text: str, prefix: str) -> dict:
         parsed = json.loads(text)
         save_json_log(parsed, prefix)
         return parsed
-    match = re.search(r"\{", text)
+    match = _JSON_START_RE.search(text)
     if not match:
         logger.error("Agent response did not contain JSON")
         raise ValueError("No JSON object found in agent response")
-    decoder = json.JSONDecoder()
-    candidate = _extract_balanced_json(text[match.start() :])
     try:
-        parsed, _ = decoder.raw_decode(candidate)
+        parsed, _ = _JSON_DECODER.raw_decode(text, match.start())
         save_json_log(parsed, prefix)
         return parsed
     except json.JSONDecodeError as exc:
         logger.error("Agent JSON parse failed: %s", exc)
+        if not settings.allow_unsafe_json_recovery:
+            raise ValueError(f"Agent response is not valid JSON: {exc}") from exc
 
-    trimmed = candidate
+    trimmed = _extract_balanced_json(text[match.start() :])
 
     try:
         parsed = ast.literal_eval(trimmed)
     except Exception:
-        normalized = re.sub(r":\s*true\b", ": True", trimmed)
-        normalized = re.sub(r":\s*false\b", ": False", normalized)
-        normalized = re.sub(r":\s*null\b", ": None", normalized)
+        normalized = _JSON_LITERAL_RE.sub(
+            lambda literal: ": " + _PY_LITERALS[literal.group(1)], trimmed
+        )
         parsed = ast.literal_eval(normalized)
 
     if isinstance(parsed, dict):
@@ -1,11 +1,15 @@
 import logging
 from typing import List
 
+from pydantic import TypeAdapter
+
 from app.models.schemas import FieldRequirement, FieldValue
 from app.services.llm import invoke_json
 
 logger = logging.getLogger(__name__)
 
+_VALUES_TA = TypeAdapter(List[FieldValue])
+
 
 async def map_fields_from_docs(
     llm,
@@ -34,18 +38,7 @@ async def map_fields_from_docs(
     result = await invoke_json(llm, prompt)
     values = result.get("values", [])
     logger.info("LLM returned %s mapped values", len(values))
-    mapped = []
-    for item in values:
-        mapped.append(
-            FieldValue(
-                name=str(item.get("name", "")),
-                value=str(item.get("value", "")),
-                source=item.get("source"),
-                confidence=item.get("confidence"),
-                notes=item.get("notes"),
-            )
-        )
-    return mapped
+    return _VALUES_TA.validate_python(values)
 
 
 def _build_prompt(fields_payload: List[dict], passport_text: str, g28_text: str) -> str:
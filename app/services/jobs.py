@@ -1,15 +1,20 @@
-import asyncio
 import logging
+import time
 import uuid
 from dataclasses import dataclass, field
+from pathlib import Path
 from typing import Dict, Optional
 
+from pydantic import ValidationError
+
+from app.config import settings
 from app.models.schemas import JobResult, JobStatus, JobView
+from app.services.files import atomic_write_text
 
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+@dataclass(slots=True)
 class JobState:
     job_id: str
     upload_id: str
@@ -18,56 +23,95 @@ class JobState:
     status: JobStatus = JobStatus.queued
     error: Optional[str] = None
     result: JobResult = field(default_factory=JobResult)
+    completed_at: Optional[float] = None
 
 
 class JobStore:
     def __init__(self) -> None:
         self._jobs: Dict[str, JobState] = {}
-        self._lock = asyncio.Lock()
-
-    async def create(self, upload_id: str, form_url: str, files: Dict[str, str]) -> JobState:
-        async with self._lock:
-            job_id = str(uuid.uuid4())
-            state = JobState(job_id=job_id, upload_id=upload_id, form_url=form_url, files=files)
-            self._jobs[job_id] = state
-            logger.info("Job created: job_id=%s upload_id=%s", job_id, upload_id)
-            return state
-
-    async def get(self, job_id: str) -> Optional[JobState]:
-        async with self._lock:
-            return self._jobs.get(job_id)
-
-    async def set_status(self, job_id: str, status: JobStatus) -> None:
-        async with self._lock:
-            job = self._jobs.get(job_id)
-            if job:
-                job.status = status
-                logger.info("Job status update: job_id=%s status=%s", job_id, status)
-
-    async def set_error(self, job_id: str, error: str) -> None:
-        async with self._lock:
-            job = self._jobs.get(job_id)
-            if job:
-                job.status = JobStatus.error
-                job.error = error
-                logger.error("Job error: job_id=%s error=%s", job_id, error)
-
-    async def set_result(self, job_id: str, result: JobResult) -> None:
-        async with self._lock:
-            job = self._jobs.get(job_id)
-            if job:
-                job.result = result
-                job.status = JobStatus.done
-                logger.info("Job result stored: job_id=%s", job_id)
-
-    async def view(self, job_id: str) -> Optional[JobView]:
-        async with self._lock:
-            job = self._jobs.get(job_id)
-            if not job:
-                return None
-            return JobView(
-                job_id=job.job_id,
-                status=job.status,
-                error=job.error,
-                result=job.result,
+
+    def create(self, upload_id: str, form_url: str, files: Dict[str, str]) -> JobState:
+        job_id = str(uuid.uuid4())
+        state = JobState(job_id=job_id, upload_id=upload_id, form_url=form_url, files=files)
+        self._jobs[job_id] = state
+        logger.info("Job created: job_id=%s upload_id=%s", job_id, upload_id)
+        return state
+
+    def get(self, job_id: str) -> Optional[JobState]:
+        return self._jobs.get(job_id)
+
+    def set_status(self, job_id: str, status: JobStatus) -> None:
+        job = self._jobs.get(job_id)
+        if job:
+            job.status = status
+            logger.info("Job status update: job_id=%s status=%s", job_id, status)
+
+    def set_error(self, job_id: str, error: str) -> None:
+        job = self._jobs.get(job_id)
+        if job:
+            job.status = JobStatus.error
+            job.error = error
+            job.completed_at = time.time()
+            logger.error("Job error: job_id=%s error=%s", job_id, error)
+
+    def set_result(self, job_id: str, result: JobResult) -> None:
+        job = self._jobs.get(job_id)
+        if job:
+            job.result = result
+            job.status = JobStatus.done
+            job.completed_at = time.time()
+            logger.info("Job result stored: job_id=%s", job_id)
+
+    def view(self, job_id: str) -> Optional[JobView]:
+        job = self._jobs.get(job_id)
+        if not job:
+            return self._load_archived(job_id)
+        return self._to_view(job)
+
+    def evict_expired(self, ttl_seconds: float) -> int:
+        cutoff = time.time() - ttl_seconds
+        expired = [
+            job
+            for job in list(self._jobs.values())
+            if job.completed_at is not None and job.completed_at <= cutoff
+        ]
+        for job in expired:
+            self._archive(job)
+            self._jobs.pop(job.job_id, None)
+        if expired:
+            logger.info("Evicted %s expired jobs", len(expired))
+        return len(expired)
+
+    def _to_view(self, job: JobState) -> JobView:
+        return JobView.model_construct(
+            job_id=job.job_id,
+            status=job.status,
+            error=job.error,
+            result=job.result,
+        )
+
+    def _archive(self, job: JobState) -> None:
+        try:
+            atomic_write_text(
+                _archive_path(job.job_id), self._to_view(job).model_dump_json(by_alias=True)
             )
+        except Exception as exc:  # pragma: no cover - log only
+            logger.error("Failed to archive job %s: %s", job.job_id, exc)
+
+    def _load_archived(self, job_id: str) -> Optional[JobView]:
+        try:
+            uuid.UUID(job_id)
+        except ValueError:
+            return None
+        path = _archive_path(job_id)
+        if not path.exists():
+            return None
+        try:
+            return JobView.model_validate_json(path.read_bytes())
+        except (OSError, ValidationError) as exc:
+            logger.warning("Archived job unreadable: job_id=%s (%s)", job_id, exc)
+            return None
+
+
+def _archive_path(job_id: str) -> Path:
+    return Path(settings.job_archive_dir) / f"{job_id}.json"
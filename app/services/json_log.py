@@ -1,35 +1,97 @@
-import json
+import asyncio
+import itertools
 import logging
-import uuid
+import os
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, Optional, Tuple
+
+import orjson
 
 
 logger = logging.getLogger(__name__)
 
+LOG_DIR = Path("LOG")
+
+_log_queue: Optional["asyncio.Queue[Tuple[Path, bytes]]"] = None
+_log_writer_task: Optional[asyncio.Task] = None
+_log_dir_ready = False
+_log_counter = itertools.count()
+
 
 def save_json_log(payload: Dict[str, Any], prefix: str) -> None:
-    log_dir = Path("LOG")
-    log_dir.mkdir(parents=True, exist_ok=True)
-    timestamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
-    filename = f"{prefix}_{timestamp}_{uuid.uuid4().hex}.json"
-    path = log_dir / filename
     try:
-        path.write_text(json.dumps(payload, indent=2, ensure_ascii=True), encoding="utf-8")
-        logger.info("Saved JSON log: %s", path)
+        data = orjson.dumps(payload, option=orjson.OPT_INDENT_2)
     except Exception as exc:  # pragma: no cover - log only
         logger.error("Failed to save JSON log: %s", exc)
+        return
+    _submit(_log_path(prefix, "json"), data)
 
 
 def save_text_log(text: str, prefix: str) -> None:
-    log_dir = Path("LOG")
-    log_dir.mkdir(parents=True, exist_ok=True)
+    _submit(_log_path(prefix, "txt"), text.encode("utf-8"))
+
+
+async def start_log_writer() -> None:
+    global _log_queue, _log_writer_task
+    if _log_writer_task is not None:
+        return
+    _ensure_log_dir()
+    _log_queue = asyncio.Queue()
+    _log_writer_task = asyncio.create_task(_log_writer(_log_queue))
+
+
+async def stop_log_writer() -> None:
+    global _log_queue, _log_writer_task
+    if _log_writer_task is None or _log_queue is None:
+        return
+    await _log_queue.join()
+    _log_writer_task.cancel()
+    await asyncio.gather(_log_writer_task, return_exceptions=True)
+    _log_queue = None
+    _log_writer_task = None
+
+
+async def _log_writer(queue: "asyncio.Queue[Tuple[Path, bytes]]") -> None:
+    while True:
+        path, data = await queue.get()
+        try:
+            await asyncio.to_thread(_write, path, data)
+        finally:
+            queue.task_done()
+
+
+def _submit(path: Path, data: bytes) -> None:
+    if _log_queue is not None and _on_event_loop():
+        _log_queue.put_nowait((path, data))
+        return
+    _write(path, data)
+
+
+def _on_event_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+def _log_path(prefix: str, suffix: str) -> Path:
     timestamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
-    filename = f"{prefix}_{timestamp}_{uuid.uuid4().hex}.txt"
-    path = log_dir / filename
+    return LOG_DIR / f"{prefix}_{timestamp}_{os.getpid()}_{next(_log_counter)}.{suffix}"
+
+
+def _ensure_log_dir() -> None:
+    global _log_dir_ready
+    if not _log_dir_ready:
+        LOG_DIR.mkdir(parents=True, exist_ok=True)
+        _log_dir_ready = True
+
+
+def _write(path: Path, data: bytes) -> None:
     try:
-        path.write_text(text, encoding="utf-8")
-        logger.info("Saved text log: %s", path)
+        _ensure_log_dir()
+        path.write_bytes(data)
+        logger.info("Saved log: %s", path)
     except Exception as exc:  # pragma: no cover - log only
-        logger.error("Failed to save text log: %s", exc)
+        logger.error("Failed to save log %s: %s", path.name, exc)
@@ -1,19 +1,39 @@
+import asyncio
 import json
 import logging
 import re
-from typing import Any, Dict
+from typing import Any, Dict, Tuple, Type, TypeVar
 
-from browser_use.llm import BaseChatModel, ChatBrowserUse, ChatGoogle, UserMessage
+from browser_use.llm import (
+    AssistantMessage,
+    BaseChatModel,
+    ChatBrowserUse,
+    ChatGoogle,
+    UserMessage,
+)
+from pydantic import BaseModel, ValidationError
 
 from app.config import settings
 from app.services.json_log import save_json_log
 
 logger = logging.getLogger(__name__)
 
+ModelT = TypeVar("ModelT", bound=BaseModel)
 
-def build_llm() -> BaseChatModel:
+
+BROWSER_USE_PROVIDERS = frozenset({"browser-use", "browser_use", "browseruse"})
+
+
+def resolve_llm() -> Tuple[str, str]:
     provider = settings.llm_provider.strip().lower()
-    if provider in {"browser-use", "browser_use", "browseruse"}:
+    if provider in BROWSER_USE_PROVIDERS:
+        return "browser_use", settings.browser_use_model
+    return "gemini", settings.gemini_model
+
+
+def build_llm() -> BaseChatModel:
+    provider, _model = resolve_llm()
+    if provider == "browser_use":
         logger.info("Initializing Browser Use LLM: %s", settings.browser_use_model)
         return ChatBrowserUse(model=settings.browser_use_model, api_key=settings.browser_use_api_key)
 
@@ -35,6 +55,48 @@ async def invoke_json(llm: BaseChatModel, prompt: str) -> Dict[str, Any]:
     return parsed
 
 
+async def repair_structured_output(
+    llm: BaseChatModel,
+    text: str,
+    output_model: Type[ModelT],
+    error: Exception,
+    max_retries: int = 2,
+) -> ModelT:
+    messages = [
+        UserMessage(
+            content=(
+                "Rewrite the following output as JSON matching the "
+                f"{output_model.__name__} schema. Keep every value unchanged.\n\n{text}"
+            )
+        )
+    ]
+    for attempt in range(max_retries):
+        messages.append(UserMessage(content=f"Your output had error: {error}. Fix and retry."))
+        await asyncio.sleep(1.0 * (attempt + 1))
+        logger.info(
+            "Retrying %s structured output (%s/%s)",
+            output_model.__name__,
+            attempt + 1,
+            max_retries,
+        )
+        try:
+            response = await llm.ainvoke(messages, output_format=output_model)
+        except Exception as exc:
+            logger.warning("Structured output retry failed: %s", exc)
+            error = exc
+            continue
+        completion = getattr(response, "completion", None)
+        if isinstance(completion, output_model):
+            return completion
+        completion_text = str(completion or "")
+        try:
+            return output_model.model_validate_json(completion_text)
+        except ValidationError as exc:
+            error = exc
+            messages.append(AssistantMessage(content=completion_text))
+    raise ValueError(f"Invalid {output_model.__name__} output after retries: {error}")
+
+
 def _parse_json(text: str) -> Dict[str, Any]:
     text = text.strip()
     if text.startswith("{") and text.endswith("}"):
@@ -0,0 +1,48 @@
+import hashlib
+import logging
+from pathlib import Path
+from typing import Optional
+
+from pydantic import ValidationError
+
+from app.config import settings
+from app.models.schemas import JobResult
+from app.services.files import atomic_write_text
+
+logger = logging.getLogger(__name__)
+
+
+def cache_key(*parts: str) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        encoded = part.encode("utf-8")
+        digest.update(len(encoded).to_bytes(8, "little"))
+        digest.update(encoded)
+    return digest.hexdigest()
+
+
+def load_cached_result(key: str) -> Optional[JobResult]:
+    path = _cache_path(key)
+    if not path.exists():
+        return None
+    try:
+        result = JobResult.model_validate_json(path.read_bytes())
+    except (OSError, ValidationError) as exc:
+        logger.warning("Evicting stale LLM cache entry %s (%s)", path.name, exc)
+        path.unlink(missing_ok=True)
+        return None
+    logger.info("LLM cache hit: %s", path.name)
+    return result
+
+
+def save_cached_result(key: str, result: JobResult) -> None:
+    path = _cache_path(key)
+    try:
+        atomic_write_text(path, result.model_dump_json(by_alias=True))
+        logger.info("LLM cache stored: %s", path.name)
+    except Exception as exc:  # pragma: no cover - cache is best effort
+        logger.error("Failed to store LLM cache entry: %s", exc)
+
+
+def _cache_path(key: str) -> Path:
+    return Path(settings.llm_cache_dir) / f"{key}.json"
@@ -1,19 +1,40 @@
 import logging
+import multiprocessing
+import os
+import subprocess
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
 from io import BytesIO
 from pathlib import Path
-from typing import Iterable, Tuple
+from typing import Optional, Sequence, Tuple
 
 import fitz
-import pytesseract
+import numpy as np
 from PIL import Image
 
 from app.config import settings
+from app.services.ocr_cache import get_page_text, set_page_text
 
-
-from passporteye import read_mrz
+try:
+    import tesserocr
+except ImportError:  # pragma: no cover
+    tesserocr = None
 
 logger = logging.getLogger(__name__)
 
+_ocr_pool: Optional[ProcessPoolExecutor] = None
+_ocr_pool_lock = threading.Lock()
+_tess_api = None
+_tess_lock = threading.Lock()
+_read_mrz = None
+_read_mrz_loaded = False
+
+PageImage = Tuple[bytes, int, int]
+
+# Crop to the bottom 35% of the page, which holds the MRZ with some margin.
+MRZ_ROI_TOP = 0.65
+
 
 def extract_pdf_text(
     pdf_path: str,
@@ -25,31 +46,11 @@ def extract_pdf_text(
         logger.warning("PDF not found: %s", pdf_path)
         return "", False
 
-    base_text, total_fields, filled_fields = _extract_text_with_fields(
-        path, use_ocr=False, column_mode=column_mode
-    )
-    if total_fields:
-        logger.info(
-            "PDF form fields found: %s total, %s with values (%s)",
-            total_fields,
-            filled_fields,
-            path.name,
-        )
-
-    if len(base_text.strip()) >= settings.ocr_min_text_length:
-        final_text = base_text
-        used_ocr = False
-    else:
-        logger.info("PDF text too short; running OCR: %s", path.name)
-        final_text, _, _ = _extract_text_with_fields(
-            path, use_ocr=True, column_mode=column_mode
-        )
-        used_ocr = True
-
-    if include_mrz:
-        final_text = _append_mrz_sections(path, final_text)
-
-    return final_text, used_ocr
+    doc = _open_pdf(path)
+    try:
+        return _extract_document_text(doc, path, include_mrz, column_mode)
+    finally:
+        doc.close()
 
 
 def extract_passport_text(path: str) -> Tuple[str, bool]:
@@ -59,84 +60,227 @@ def extract_passport_text(path: str) -> Tuple[str, bool]:
         return "", False
 
     if file_path.suffix.lower() == ".pdf":
-        text, used_ocr = extract_pdf_text(str(file_path), include_mrz=False)
-        mrz_text, mrz_parsed = _extract_mrz_from_pdf_images(file_path)
-        if mrz_text:
-            text = _append_section(text, "MRZ", mrz_text)
-        if mrz_parsed:
-            text = _append_section(text, "MRZ PARSED", mrz_parsed)
-        return text, used_ocr
+        doc = _open_pdf(file_path)
+        try:
+            text, used_ocr = _extract_document_text(
+                doc, file_path, include_mrz=False, column_mode="single"
+            )
+            mrz_text, mrz_parsed = _extract_mrz_from_pdf_images(doc, file_path)
+        finally:
+            doc.close()
+        return _join_mrz_sections(text, mrz_text, mrz_parsed), used_ocr
 
     text = _extract_image_text(file_path)
     mrz_text, mrz_parsed = _extract_mrz_with_passporteye(file_path)
+    return _join_mrz_sections(text, mrz_text, mrz_parsed), True
+
+
+def _open_pdf(path: Path) -> fitz.Document:
+    # MuPDF streams the file itself; fitz.open(stream=...) would copy it into bytes first.
+    return fitz.open(str(path), filetype="pdf")
+
+
+def _extract_document_text(
+    doc: fitz.Document,
+    path: Path,
+    include_mrz: bool,
+    column_mode: str,
+) -> Tuple[str, bool]:
+    final_text, total_fields, filled_fields, used_ocr = _extract_text_with_fields(
+        doc, path, column_mode
+    )
+    if total_fields:
+        logger.info(
+            "PDF form fields found: %s total, %s with values (%s)",
+            total_fields,
+            filled_fields,
+            path.name,
+        )
+
+    if include_mrz:
+        final_text = _append_mrz_sections(doc, path, final_text)
 
-    if mrz_text:
-        text = _append_section(text, "MRZ", mrz_text)
-    if mrz_parsed:
-        text = _append_section(text, "MRZ PARSED", mrz_parsed)
-    return text, True
+    return final_text, used_ocr
 
 
 def _extract_text_with_fields(
-    path: Path, use_ocr: bool, column_mode: str
-) -> Tuple[str, int, int]:
-    doc = fitz.open(str(path))
-    parts = []
+    doc: fitz.Document, path: Path, column_mode: str
+) -> Tuple[str, int, int, bool]:
+    pages = []
+    page_texts: list[Optional[str]] = []
+    page_text_lines = []
+    page_field_lines = []
+    ocr_pages = []
     total_fields = 0
     filled_fields = 0
-    for index, page in enumerate(doc, start=1):
+    for index, page in enumerate(doc):
+        logger.info("Reading page %s/%s for %s", index + 1, doc.page_count, path.name)
+        pages.append(page)
+        field_lines, page_total, page_filled = _extract_page_field_lines(page)
+        total_fields += page_total
+        filled_fields += page_filled
+        page_field_lines.append(field_lines)
+
+        if column_mode == "single" and not page_total:
+            page_text: Optional[str] = page.get_text(sort=True).strip()
+            text_lines = []
+            text_length = _visible_length(page_text)
+        else:
+            page_text = None
+            text_lines = _extract_page_text_lines(page)
+            text_length = sum(_visible_length(line) for _y, _x, line in text_lines)
+        if text_length < settings.ocr_min_page_text_length:
+            ocr_pages.append(index)
+            page_text = None
+        page_texts.append(page_text)
+        page_text_lines.append(text_lines)
+
+    if ocr_pages:
         logger.info(
-            "Reading page %s/%s for %s (use_ocr=%s)",
-            index,
+            "Page text too short; running OCR on %s/%s pages: %s",
+            len(ocr_pages),
             doc.page_count,
             path.name,
-            use_ocr,
         )
-        page_text, page_total, page_filled = _merge_page_text_with_fields(
-            page, use_ocr, column_mode
+        ocr_lines = _extract_pages_ocr_lines([pages[index] for index in ocr_pages])
+        for index, lines in zip(ocr_pages, ocr_lines):
+            page_text_lines[index] = lines
+
+    parts = [
+        page_text
+        if page_text is not None
+        else _merge_page_text_with_fields(page, text_lines, field_lines, column_mode)
+        for page, page_text, text_lines, field_lines in zip(
+            pages, page_texts, page_text_lines, page_field_lines
         )
-        total_fields += page_total
-        filled_fields += page_filled
-        parts.append(page_text)
-    return "\n".join(parts), total_fields, filled_fields
+    ]
+    return "\n".join(parts), total_fields, filled_fields, bool(ocr_pages)
+
+
+def _visible_length(text: str) -> int:
+    return len("".join(text.split()))
 
 
 def _merge_page_text_with_fields(
-    page: fitz.Page, use_ocr: bool, column_mode: str
-) -> Tuple[str, int, int]:
-    text_lines = (
-        _extract_page_text_lines(page)
-        if not use_ocr
-        else _extract_page_ocr_lines(page)
-    )
-    field_lines, total, filled = _extract_page_field_lines(page)
+    page: fitz.Page,
+    text_lines: list[tuple[float, float, str]],
+    field_lines: list[tuple[float, float, str]],
+    column_mode: str,
+) -> str:
+    if column_mode == "single" and not field_lines:
+        return "\n".join([line for _y, _x, line in text_lines if line])
     combined = text_lines + field_lines
     ordered = _arrange_lines(combined, page, column_mode)
-    merged_text = "\n".join([line for _y, _x, line in ordered if line])
-    return merged_text, total, filled
+    return "\n".join([line for _y, _x, line in ordered if line])
 
 
 def _extract_page_text_lines(page: fitz.Page) -> list[tuple[float, float, str]]:
-    content = page.get_text("dict")
-    lines = []
-    for block in content.get("blocks", []):
-        for line in block.get("lines", []):
-            spans = line.get("spans", [])
-            line_text = "".join(span.get("text", "") for span in spans).strip()
-            if not line_text:
-                continue
-            bbox = line.get("bbox") or [0, 0, 0, 0]
-            lines.append((float(bbox[1]), float(bbox[0]), line_text))
-    return lines
+    grouped: dict[tuple[int, int], list] = {}
+    for x0, y0, _x1, _y1, word, block_no, line_no, _word_no in page.get_text("words", sort=True):
+        entry = grouped.get((block_no, line_no))
+        if entry is None:
+            grouped[(block_no, line_no)] = [float(y0), float(x0), [word]]
+        else:
+            entry[0] = min(entry[0], float(y0))
+            entry[1] = min(entry[1], float(x0))
+            entry[2].append(word)
+    return [(y0, x0, " ".join(words)) for y0, x0, words in grouped.values()]
 
 
 def _extract_page_ocr_lines(page: fitz.Page) -> list[tuple[float, float, str]]:
-    pix = page.get_pixmap(dpi=200)
-    mode = "RGB" if pix.alpha == 0 else "RGBA"
-    image = Image.frombytes(mode, [pix.width, pix.height], pix.samples)
-    if mode == "RGBA":
-        image = image.convert("RGB")
-    text = pytesseract.image_to_string(image)
+    pix = _render_ocr_pixmap(page)
+    samples = pix.samples
+    text = get_page_text(samples)
+    if text is None:
+        text = _ocr_page_worker(samples, pix.width, pix.height)
+        set_page_text(samples, text)
+    return _ocr_text_to_lines(text, page)
+
+
+def _extract_pages_ocr_lines(pages: list[fitz.Page]) -> list[list[tuple[float, float, str]]]:
+    if len(pages) <= 1:
+        return [_extract_page_ocr_lines(page) for page in pages]
+
+    texts: list[Optional[str]] = []
+    jobs = []
+    for page in pages:
+        pix = _render_ocr_pixmap(page)
+        samples = pix.samples
+        cached = get_page_text(samples)
+        texts.append(cached)
+        if cached is None:
+            jobs.append((len(texts) - 1, samples, pix.width, pix.height))
+
+    if jobs:
+        chunk_size = -(-len(jobs) // _ocr_worker_count())
+        chunks = [jobs[start : start + chunk_size] for start in range(0, len(jobs), chunk_size)]
+        page_chunks = [[job[1:] for job in chunk] for chunk in chunks]
+        results = _get_ocr_pool().map(_ocr_batch_worker, page_chunks)
+        for chunk, chunk_texts in zip(chunks, results):
+            for (position, samples, *_rest), text in zip(chunk, chunk_texts):
+                texts[position] = text
+                set_page_text(samples, text)
+    return [_ocr_text_to_lines(text or "", page) for text, page in zip(texts, pages)]
+
+
+def _ocr_page_worker(samples: bytes, width: int, height: int) -> str:
+    if tesserocr is None:
+        import pytesseract
+
+        gray = np.frombuffer(samples, dtype=np.uint8).reshape(height, width)
+        return pytesseract.image_to_string(gray, lang=settings.ocr_lang)
+    with _tess_lock:
+        api = _get_tess_api()
+        api.SetImageBytes(samples, width, height, 1, width)
+        return api.GetUTF8Text()
+
+
+def _ocr_batch_worker(pages: list[PageImage]) -> list[str]:
+    if tesserocr is not None or len(pages) == 1:
+        return [_ocr_page_worker(*page) for page in pages]
+    return _extract_all_pages_ocr_batched(pages)
+
+
+def _extract_all_pages_ocr_batched(pages: list[PageImage]) -> list[str]:
+    with tempfile.TemporaryDirectory(prefix="ocr_batch_") as tmp_dir:
+        image_paths = []
+        for index, page in enumerate(pages):
+            samples, width, height = page
+            image_path = os.path.join(tmp_dir, f"page_{index:04d}.pgm")
+            Image.frombytes("L", (width, height), samples).save(image_path, format="PPM")
+            image_paths.append(image_path)
+        filelist_path = os.path.join(tmp_dir, "filelist.txt")
+        with open(filelist_path, "w", encoding="utf-8") as handle:
+            handle.write("\n".join(image_paths))
+        import pytesseract
+
+        completed = subprocess.run(
+            [
+                pytesseract.pytesseract.tesseract_cmd,
+                filelist_path,
+                "stdout",
+                "-l",
+                settings.ocr_lang,
+                "-c",
+                "page_separator=\f",
+            ],
+            capture_output=True,
+        )
+    texts = completed.stdout.decode("utf-8", errors="ignore").split("\f")
+    if completed.returncode != 0 or len(texts) < len(pages):
+        logger.warning(
+            "Batched Tesseract run failed (rc=%s); falling back to per-page OCR",
+            completed.returncode,
+        )
+        return [_ocr_page_worker(*page) for page in pages]
+    return texts[: len(pages)]
+
+
+def _render_ocr_pixmap(page: fitz.Page) -> fitz.Pixmap:
+    return page.get_pixmap(dpi=settings.ocr_dpi, colorspace=fitz.csGRAY, alpha=False)
+
+
+def _ocr_text_to_lines(text: str, page: fitz.Page) -> list[tuple[float, float, str]]:
     raw_lines = [line.strip() for line in text.splitlines() if line.strip()]
     if not raw_lines:
         return []
@@ -145,6 +289,54 @@ def _extract_page_ocr_lines(page: fitz.Page) -> list[tuple[float, float, str]]:
     return [(step * (index + 1), 0.0, line) for index, line in enumerate(raw_lines)]
 
 
+def _image_to_string(image: Image.Image) -> str:
+    if tesserocr is None:
+        import pytesseract
+
+        return pytesseract.image_to_string(image, lang=settings.ocr_lang)
+    with _tess_lock:
+        api = _get_tess_api()
+        api.SetImage(image)
+        return api.GetUTF8Text()
+
+
+def _get_tess_api():
+    global _tess_api
+    if _tess_api is None:
+        logger.info("Loading Tesseract API (lang=%s)", settings.ocr_lang)
+        _tess_api = tesserocr.PyTessBaseAPI(lang=settings.ocr_lang)
+    return _tess_api
+
+
+def _ocr_worker_count() -> int:
+    return settings.ocr_workers or os.cpu_count() or 1
+
+
+def _get_ocr_pool() -> ProcessPoolExecutor:
+    global _ocr_pool
+    with _ocr_pool_lock:
+        if _ocr_pool is None:
+            # One Tesseract thread per worker process avoids oversubscribing cores.
+            os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+            workers = _ocr_worker_count()
+            logger.info("Starting OCR process pool with %s workers", workers)
+            # Forking from a threaded server can inherit held MuPDF/sqlite locks.
+            _ocr_pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _ocr_pool
+
+
+def shutdown_ocr_pool() -> None:
+    global _ocr_pool
+    with _ocr_pool_lock:
+        pool, _ocr_pool = _ocr_pool, None
+    if pool is not None:
+        logger.info("Stopping OCR process pool")
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
 def _extract_page_field_lines(
     page: fitz.Page,
 ) -> Tuple[list[tuple[float, float, str]], int, int]:
@@ -177,19 +369,21 @@ def _extract_page_field_lines(
 
 
 def _arrange_lines(
-    lines: Iterable[tuple[float, float, str]],
+    lines: Sequence[tuple[float, float, str]],
     page: fitz.Page,
     column_mode: str,
 ) -> list[tuple[float, float, str]]:
-    if column_mode != "two-column":
-        return sorted(lines, key=lambda item: (item[0], item[1]))
-
-    mid = float(page.rect.x0 + (page.rect.width / 2))
-    left = [item for item in lines if item[1] <= mid]
-    right = [item for item in lines if item[1] > mid]
-    left_sorted = sorted(left, key=lambda item: (item[0], item[1]))
-    right_sorted = sorted(right, key=lambda item: (item[0], item[1]))
-    return left_sorted + right_sorted
+    if not lines:
+        return []
+    count = len(lines)
+    ys = np.fromiter((item[0] for item in lines), dtype=np.float64, count=count)
+    xs = np.fromiter((item[1] for item in lines), dtype=np.float64, count=count)
+    order = np.lexsort((xs, ys))
+    if column_mode == "two-column":
+        mid = float(page.rect.x0 + (page.rect.width / 2))
+        right = xs[order] > mid
+        order = np.concatenate((order[~right], order[right]))
+    return [lines[index] for index in order.tolist()]
 
 
 def _extract_image_text(path: Path) -> str:
@@ -201,81 +395,107 @@ def _extract_image_text(path: Path) -> str:
 
     if image.mode != "RGB":
         image = image.convert("RGB")
-    return pytesseract.image_to_string(image)
+    return _image_to_string(image)
 
 
-def _append_mrz_sections(path: Path, text: str) -> str:
-    mrz_text, mrz_parsed = _extract_mrz_with_passporteye(path)
-    if mrz_text:
-        text = _append_section(text, "MRZ", mrz_text)
-    if mrz_parsed:
-        text = _append_section(text, "MRZ PARSED", mrz_parsed)
+def _append_mrz_sections(doc: fitz.Document, path: Path, text: str) -> str:
+    mrz_text, mrz_parsed = _extract_mrz_from_pdf_images(doc, path)
     if not mrz_text:
         logger.info("MRZ not detected: %s", path.name)
-    return text
+    return _join_mrz_sections(text, mrz_text, mrz_parsed)
 
 
-def _extract_text_ocr(path: Path) -> str:
-    doc = fitz.open(str(path))
+def _extract_text_ocr(doc: fitz.Document) -> str:
     texts = []
     for page in doc:
-        pix = page.get_pixmap(dpi=200)
-        mode = "RGB" if pix.alpha == 0 else "RGBA"
-        image = Image.frombytes(mode, [pix.width, pix.height], pix.samples)
-        if mode == "RGBA":
-            image = image.convert("RGB")
-        texts.append(pytesseract.image_to_string(image))
+        pix = _render_ocr_pixmap(page)
+        texts.append(_ocr_page_worker(pix.samples, pix.width, pix.height))
     return "\n".join(texts)
 
 
 def _extract_mrz_with_passporteye(path: Path) -> Tuple[str, str]:
+    read_mrz = _get_read_mrz()
     if read_mrz is None:
         logger.warning("PassportEye not installed; skipping MRZ detection.")
         return "", ""
 
     try:
-        if path.suffix.lower() == ".pdf":
-            return _extract_mrz_from_pdf_images(path)
-        else:
-            with path.open("rb") as handle:
-                mrz = read_mrz(handle)
-            mrz_text = _mrz_to_string(mrz)
-            mrz_parsed = _mrz_to_parsed_string(mrz)
-            if mrz_text:
-                logger.info("PassportEye MRZ detected (%s)", path.name)
-            return mrz_text, mrz_parsed
+        with path.open("rb") as handle:
+            mrz = read_mrz(handle)
+        mrz_text = _mrz_to_string(mrz)
+        mrz_parsed = _mrz_to_parsed_string(mrz)
+        if mrz_text:
+            logger.info("PassportEye MRZ detected (%s)", path.name)
+        return mrz_text, mrz_parsed
     except Exception as exc:
         logger.warning("PassportEye MRZ detection failed: %s (%s)", path.name, exc)
         return "", ""
 
-    return "", ""
-
 
-def _extract_mrz_from_pdf_images(path: Path) -> Tuple[str, str]:
+def _extract_mrz_from_pdf_images(
+    doc: fitz.Document,
+    path: Path,
+    pages_to_try: Optional[Sequence[int]] = None,
+) -> Tuple[str, str]:
+    read_mrz = _get_read_mrz()
     if read_mrz is None:
         logger.warning("PassportEye not installed; skipping MRZ detection.")
         return "", ""
-    try:
-        doc = fitz.open(str(path))
-        for index in range(doc.page_count - 1, -1, -1):
-            pix = doc[index].get_pixmap(dpi=300)
-            image_bytes = pix.tobytes("png")
-            mrz = read_mrz(BytesIO(image_bytes))
+    if pages_to_try is None:
+        pages_to_try = [doc.page_count - 1, 0]
+    page_indices = [
+        index for index in dict.fromkeys(pages_to_try) if 0 <= index < doc.page_count
+    ]
+    for index in page_indices:
+        try:
+            page = doc[index]
+            rect = page.rect
+            roi = fitz.Rect(rect.x0, rect.y0 + rect.height * MRZ_ROI_TOP, rect.x1, rect.y1)
+            mrz = _read_mrz_pixmap(read_mrz, _render_mrz_pixmap(page, roi))
             mrz_text = _mrz_to_string(mrz)
-            if mrz_text:
-                mrz_parsed = _mrz_to_parsed_string(mrz)
-                logger.info(
-                    "PassportEye MRZ detected on page %s (%s)",
-                    index + 1,
-                    path.name,
-                )
-                return mrz_text, mrz_parsed
-    except Exception as exc:
-        logger.warning("PassportEye MRZ detection failed: %s (%s)", path.name, exc)
-        return "", ""
+            if not mrz_text:
+                mrz = _read_mrz_pixmap(read_mrz, _render_mrz_pixmap(page))
+                mrz_text = _mrz_to_string(mrz)
+        except Exception as exc:
+            logger.warning(
+                "PassportEye MRZ detection failed on page %s: %s (%s)",
+                index + 1,
+                path.name,
+                exc,
+            )
+            continue
+        if mrz_text:
+            mrz_parsed = _mrz_to_parsed_string(mrz)
+            logger.info(
+                "PassportEye MRZ detected on page %s (%s)",
+                index + 1,
+                path.name,
+            )
+            return mrz_text, mrz_parsed
     return "", ""
 
 
+def _render_mrz_pixmap(page: fitz.Page, clip: Optional[fitz.Rect] = None) -> fitz.Pixmap:
+    return page.get_pixmap(dpi=300, clip=clip, colorspace=fitz.csGRAY, alpha=False)
+
+
+def _read_mrz_pixmap(read_mrz, pix: fitz.Pixmap):
+    # PassportEye only loads paths, bytes or file objects; PNM skips PNG's deflate pass.
+    return read_mrz(BytesIO(pix.tobytes("pnm")))
+
+
+def _get_read_mrz():
+    global _read_mrz, _read_mrz_loaded
+    if not _read_mrz_loaded:
+        try:
+            from passporteye import read_mrz
+        except ImportError:
+            read_mrz = None
+        _read_mrz = read_mrz
+        _read_mrz_loaded = True
+    return _read_mrz
+
+
 def _mrz_to_string(mrz: object) -> str:
     if mrz is None:
         return ""
@@ -303,23 +523,28 @@ def _mrz_to_parsed_string(mrz: object) -> str:
 
 
 def _normalize_field_value(value: object) -> str:
-    if value is None:
-        return ""
     if isinstance(value, bytes):
         return value.decode("utf-8", errors="ignore").strip()
+    if value is None:
+        return ""
     if isinstance(value, (list, tuple)):
-        parts = [_normalize_field_value(item) for item in value]
-        return ", ".join([part for part in parts if part])
-    text = str(value).strip()
-    if text.startswith("/"):
-        text = text[1:]
-    return text
+        return ", ".join(filter(None, map(_normalize_field_value, value)))
+    return str(value).strip().lstrip("/")
+
 
+def has_mrz_section(text: str) -> bool:
+    return "[MRZ]\n" in text
 
-def _append_section(text: str, title: str, section_text: str) -> str:
-    if not section_text:
+
+def _join_mrz_sections(text: str, mrz_text: str, mrz_parsed: str) -> str:
+    if not mrz_text and not mrz_parsed:
         return text
-    header = f"[{title}]"
-    if not text.strip():
-        return f"{header}\n{section_text}"
-    return f"{text}\n\n{header}\n{section_text}"
+    sections = [text] if text.strip() else []
+    _append_section(sections, "MRZ", mrz_text)
+    _append_section(sections, "MRZ PARSED", mrz_parsed)
+    return "\n\n".join(sections)
+
+
+def _append_section(sections: list[str], title: str, section_text: str) -> None:
+    if section_text:
+        sections.append(f"[{title}]\n{section_text}")
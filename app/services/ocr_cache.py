@@ -0,0 +1,115 @@
+import hashlib
+import importlib.util
+import json
+import logging
+import threading
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Optional, Tuple
+
+import diskcache
+
+from app.config import settings
+from app.services.files import atomic_write_text
+from app.services.llm_cache import cache_key
+
+logger = logging.getLogger(__name__)
+
+OCR_CACHE_VERSION = "ocr_v5"
+
+PAGE_CACHE_SIZE_LIMIT = 2 << 30
+
+Extractor = Callable[..., Tuple[str, bool]]
+
+_page_cache: Optional[diskcache.Cache] = None
+_page_cache_lock = threading.Lock()
+
+
+def cached_extract(
+    extractor: Extractor,
+    path: str,
+    *args: object,
+    cache_if: Optional[Callable[[str], bool]] = None,
+) -> Tuple[str, bool]:
+    file_path = Path(path)
+    if not file_path.is_file():
+        return extractor(path, *args)
+
+    key = cache_key(
+        OCR_CACHE_VERSION,
+        extractor.__name__,
+        file_sha256(file_path),
+        settings.ocr_lang,
+        str(settings.ocr_dpi),
+        str(settings.ocr_min_page_text_length),
+        str(_passporteye_available()),
+        *(repr(arg) for arg in args),
+    )
+    cache_path = Path(settings.ocr_cache_dir) / f"{key}.json"
+    try:
+        cached = json.loads(cache_path.read_text(encoding="utf-8"))
+        logger.info("OCR cache hit: %s (%s)", file_path.name, extractor.__name__)
+        return str(cached["text"]), bool(cached["used_ocr"])
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError, KeyError) as exc:
+        logger.warning("Ignoring unreadable OCR cache entry %s (%s)", cache_path.name, exc)
+
+    text, used_ocr = extractor(path, *args)
+    if cache_if is None or cache_if(text):
+        _store(cache_path, {"text": text, "used_ocr": used_ocr})
+    else:
+        logger.info("Not caching incomplete OCR result: %s", file_path.name)
+    return text, used_ocr
+
+
+def get_page_text(samples: bytes) -> Optional[str]:
+    try:
+        text = _get_page_cache().get(_page_key(samples))
+    except Exception as exc:  # pragma: no cover - cache is best effort
+        logger.warning("OCR page cache read failed: %s", exc)
+        return None
+    return text if isinstance(text, str) else None
+
+
+def set_page_text(samples: bytes, text: str) -> None:
+    try:
+        _get_page_cache().set(_page_key(samples), text)
+    except Exception as exc:  # pragma: no cover - cache is best effort
+        logger.error("Failed to store OCR page cache entry: %s", exc)
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        for chunk in iter(lambda: handle.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _store(path: Path, payload: dict) -> None:
+    try:
+        atomic_write_text(path, json.dumps(payload))
+    except Exception as exc:  # pragma: no cover - cache is best effort
+        logger.error("Failed to store OCR cache entry: %s", exc)
+
+
+@lru_cache(maxsize=1)
+def _passporteye_available() -> bool:
+    return importlib.util.find_spec("passporteye") is not None
+
+
+def _page_key(samples: bytes) -> str:
+    digest = hashlib.blake2b(samples, digest_size=16).hexdigest()
+    return f"{OCR_CACHE_VERSION}:{settings.ocr_lang}:{digest}"
+
+
+def _get_page_cache() -> diskcache.Cache:
+    global _page_cache
+    with _page_cache_lock:
+        if _page_cache is None:
+            _page_cache = diskcache.Cache(
+                str(Path(settings.ocr_cache_dir) / "pages"),
+                size_limit=PAGE_CACHE_SIZE_LIMIT,
+            )
+        return _page_cache
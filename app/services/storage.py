@@ -1,16 +1,24 @@
+import functools
+import json
 import logging
+import os
 import shutil
+import tempfile
 import uuid
 from pathlib import Path
-from typing import Dict, Tuple
+from typing import BinaryIO, Dict, Optional, Tuple
 
 from fastapi import UploadFile
 
 from app.config import settings
+from app.services.files import atomic_write_text
 
 logger = logging.getLogger(__name__)
 
+COPY_BUFFER_SIZE = 1024 * 1024
 
+
+@functools.lru_cache(maxsize=1)
 def ensure_upload_root() -> Path:
     upload_root = Path(settings.upload_dir)
     upload_root.mkdir(parents=True, exist_ok=True)
@@ -29,20 +37,81 @@ def save_uploads(passport: UploadFile, g28: UploadFile) -> Tuple[str, Dict[str,
         filename = upload.filename or f"{key}.pdf"
         destination = upload_dir / filename
         logger.info("Saving %s to %s", key, destination.name)
-        with destination.open("wb") as handle:
-            shutil.copyfileobj(upload.file, handle)
+        flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0)
+        with os.fdopen(os.open(destination, flags, 0o644), "wb") as handle:
+            _copy_upload(upload.file, handle)
         saved[key] = str(destination)
 
+    _write_manifest(upload_root, upload_id, saved)
     return upload_id, saved
 
 
+def get_upload_files(upload_id: str) -> Dict[str, str]:
+    try:
+        uuid.UUID(upload_id)
+    except ValueError:
+        return {}
+    try:
+        return dict(_load_manifest(upload_id))
+    except (OSError, ValueError) as exc:
+        logger.warning("Upload manifest unavailable: upload_id=%s (%s)", upload_id, exc)
+        return {}
+
+
 def get_upload_paths(upload_id: str) -> Dict[str, str]:
     upload_root = ensure_upload_root()
-    upload_dir = upload_root / upload_id
-    if not upload_dir.exists():
-        return {}
+    upload_dir = str(upload_root / upload_id)
     files = {}
-    for item in upload_dir.iterdir():
-        if item.is_file():
-            files[item.stem.lower()] = str(item)
+    try:
+        with os.scandir(upload_dir) as entries:
+            for entry in entries:
+                if entry.is_file(follow_symlinks=False):
+                    name = entry.name
+                    files[name.rsplit(".", 1)[0].lower()] = os.path.join(upload_dir, name)
+    except FileNotFoundError:
+        return {}
     return files
+
+
+def _copy_upload(source: BinaryIO, handle: BinaryIO) -> None:
+    source_fd = _source_fileno(source)
+    if source_fd is not None and hasattr(os, "sendfile"):
+        start = source.tell()
+        try:
+            source.flush()
+            offset = start
+            remaining = os.fstat(source_fd).st_size - offset
+            out_fd = handle.fileno()
+            while remaining > 0:
+                sent = os.sendfile(out_fd, source_fd, offset, remaining)
+                if sent == 0:
+                    break
+                offset += sent
+                remaining -= sent
+            return
+        except OSError as exc:
+            logger.info("sendfile unavailable (%s); falling back to buffered copy", exc)
+            source.seek(start)
+            handle.seek(0)
+            handle.truncate()
+    shutil.copyfileobj(source, handle, length=COPY_BUFFER_SIZE)
+
+
+def _source_fileno(source: BinaryIO) -> Optional[int]:
+    # fileno() on an in-memory SpooledTemporaryFile would force it to disk.
+    if isinstance(source, tempfile.SpooledTemporaryFile) and not getattr(source, "_rolled", False):
+        return None
+    try:
+        return source.fileno()
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+def _write_manifest(upload_root: Path, upload_id: str, files: Dict[str, str]) -> None:
+    atomic_write_text(upload_root / f"{upload_id}.json", json.dumps(files))
+
+
+@functools.lru_cache(maxsize=256)
+def _load_manifest(upload_id: str) -> Dict[str, str]:
+    path = ensure_upload_root() / f"{upload_id}.json"
+    return json.loads(path.read_text(encoding="utf-8"))